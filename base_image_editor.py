@@ -1,16 +1,165 @@
+import asyncio
+import glob
 import os
-import base64
-import mimetypes
 import random
-import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
 from google import genai
-from google.genai import types
+from google.genai import errors, types
 from PIL import Image
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Maximum number of Gemini requests in flight at once
+MAX_CONCURRENT_REQUESTS = 5
+
+# Retries for a rate limited (HTTP 429) request, with exponential backoff
+MAX_RATE_LIMIT_RETRIES = 5
+
+# Per-request API timeout in milliseconds
+REQUEST_TIMEOUT_MS = 60_000
+
+# Re-upload the base image this long before the Files API deletes it
+UPLOAD_EXPIRY_MARGIN = timedelta(hours=1)
+
+# Files API retention, used if an upload comes back without an expiration time
+UPLOAD_RETENTION = timedelta(hours=48)
+
+# MIME types for the supported image extensions, and the reverse lookup
+_EXT_TO_MIME = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".webp": "image/webp",
+    ".bmp": "image/bmp",
+}
+_MIME_TO_EXT = {
+    "image/png": ".png",
+    "image/jpeg": ".jpg",
+    "image/webp": ".webp",
+    "image/bmp": ".bmp",
+}
+
+# Image extensions: accepted for the base image, and every extension a saved
+# output can have (_MIME_TO_EXT values plus the legacy '.jpeg')
+_IMAGE_EXTENSIONS = tuple(_EXT_TO_MIME)
+
+# Random pools for outfit and background variations; repeated entries are drawn more often
+_TOPS = (
+    "plain t-shirt", "hoodie", "sweater", "cardigan", "blouse", "tank top",
+    "long-sleeve shirt", "polo shirt", "button-up shirt", "crop top",
+    "plain t-shirt", "graphic tee", "hoodie", "crewneck sweater", "zip-up hoodie",
+    "cardigan", "blouse", "tank top", "long-sleeve shirt", "crop top",
+    "off-shoulder top", "button-up shirt", "polo shirt", "tube top", "knit top",
+    "halter top", "peplum top", "wrap top", "mock neck top", "camisole"
+)
+
+_BOTTOMS = (
+    "jeans", "leggings", "sweatpants", "shorts", "joggers", "chinos",
+    "casual pants", "denim shorts", "yoga pants", "wide-leg trousers",
+    "jeans", "denim shorts", "leggings", "joggers", "sweatpants",
+    "cargo pants", "bike shorts", "mini skirt", "midi skirt",
+    "culottes", "overalls", "capri pants", "khaki shorts", "skort",
+    "paperbag waist shorts", "pleated skirt", "track pants", "flare jeans",
+    "athletic shorts"
+)
+
+_ACCESSORIES = (
+    "", "with a simple necklace", "with small earrings", "with a bracelet", ""
+)
+
+_BEDROOM_ELEMENTS = (
+    "slightly shift the camera angle to show more of the left side of the bedroom",
+    "adjust the view to reveal more of the right side of the room",
+    "shift the perspective to show a bit more of the background wall",
+    "move the viewpoint to include more of the bedroom decor in the background",
+    "adjust the angle to show a different section of the room's furniture",
+    "shift the frame to reveal more of the bedroom's ambient lighting",
+    "change the perspective to show a different corner of the bedroom",
+    "modify the view to include more of the bedroom's wall decorations",
+    "adjust the framing to show a slightly different portion of the room",
+    "shift the camera position to reveal different bedroom elements in the background"
+)
+
+# Output filename stems cleared before each run, keyed by menu expression type
+_OUTPUT_STEMS = {
+    "neutral": "baseimage",
+    "sobbing": "cryingbaseimage",
+    "snapchat": "snapchat",
+    "snapchat_same_outfit": "snapchatsame",
+}
+
+# Expression instructions appended to the prompt, keyed by expression type
+_EXPRESSION_MAP = {
+    "neutral": "\n4. EXPRESSION: alter her expression to a different neutral expression with a change in head tilt.",
+    "sobbing": "\n4. EXPRESSION: Change her expression and make it look like she is sobbing.",
+    "snapchat_goofy": "\n4. EXPRESSION: have a silly face with side eye. bring camera closer to face.",
+    "snapchat_tongue": "\n4. EXPRESSION: have a goofy face with silly tongue out. bring camera closer to face.",
+    "snapchat_confused": "\n4. EXPRESSION: have a shocked face. bring camera closer to face.",
+    "snapchat_shocked": "\n4. EXPRESSION: have a silly confused face. bring camera closer to face.",
+    "snapchat_crying": "\n4. EXPRESSION: Change her expression and make it look like she is sobbing. Bring camera closer to face",
+}
+# Same-outfit Snapchat types share the instructions of their Snapchat counterpart
+_EXPRESSION_MAP.update({
+    expression_type.replace("snapchat_", "snapchat_same_"): expression_change
+    for expression_type, expression_change in _EXPRESSION_MAP.items()
+    if expression_type.startswith("snapchat_")
+})
+
+# Clothing instruction for the prompt, depending on whether the outfit is kept
+_CLOTHING_FIXED = "Keep outfit exactly the same."
+_CLOTHING_RANDOM = "Change the person's outfit to: {outfit}. Keep the style casual and natural-looking."
+
+_PROMPT_TEMPLATE = """Create a variation of this selfie image with the following changes:
+
+1. CLOTHING: {clothing}
+
+2. BACKGROUND: {background_change}. Maintain the same setting as the original input image with a slight perspective change.
+
+3. REQUIREMENTS:
+   - Keep the same person's face and general pose
+   - If the person's arm is extended under the camera, keep it in a selfie position with arm etended below.
+   - Maintain the selfie/portrait style composition
+   - Keep lighting natural and consistent with a bedroom environment
+   - Ensure the outfit looks realistic and well-fitted
+   - Keep the overall mood and atmosphere similar to the original
+   - Do not change any of the decor or bedroom background
+   - Keep the person's position the same
+   - Do not change the setting
+   - No artifacts or filters on the image
+   - No change in camera position{expression_change}
+
+Generate a high-quality, realistic variation that maintains the original's authenticity while incorporating these changes."""
+
+# Request pieces that are identical for every variation, built once at import
+_EMPTY_MODEL_TURN = types.Content(
+    role="model",
+    parts=[],
+)
+_GENERATE_TURN = types.Content(
+    role="user",
+    parts=[
+        types.Part.from_text(text="Generate the variation now."),
+    ],
+)
+_GENERATE_CONFIG = types.GenerateContentConfig(
+    response_modalities=[
+        "IMAGE",
+        "TEXT",
+    ],
+)
+
+@dataclass(frozen=True)
+class BaseImageCtx:
+    """
+    Base image data shared by every variation in a generation run
+    """
+    image_part: types.Part
+    prefix: str
+
 class BaseImageEditor:
     def __init__(self, api_key):
         """
@@ -19,16 +168,41 @@ class BaseImageEditor:
         Args:
             api_key (str): Your Google AI API key
         """
-        self.client = genai.Client(api_key=api_key)
+        # A single client is shared by every request; concurrent variations
+        # reuse its pooled HTTPS connections instead of reconnecting per call
+        self.client = genai.Client(
+            api_key=api_key,
+            http_options=types.HttpOptions(timeout=REQUEST_TIMEOUT_MS),
+        )
         self.model = "gemini-2.5-flash-image-preview"
         
         # Define paths
         self.starting_image_dir = "starting_image"
         self.output_dir = "output"
         
+        # Base image path, found on first use; it doesn't change mid-session
+        self._base_image_path = None
+        
+        # Files uploaded to the Files API, deleted again on aclose()
+        self._uploaded_files = []
+        
+        # Base image context reused across menu actions until the file changes
+        self._base_image_ctx = None
+        self._base_image_key = None
+        self._base_image_expires_at = None
+        
         # Create output directory if it doesn't exist
         os.makedirs(self.output_dir, exist_ok=True)
     
+    async def warm_up(self):
+        """
+        Open a connection to the API so the first upload and generation skip the TLS handshake
+        """
+        try:
+            await self.client.aio.models.list(config={"page_size": 1})
+        except Exception as e:
+            print(f"⚠️  Could not pre-connect to the Gemini API: {str(e)}")
+    
     def get_base_image_path(self):
         """
         Find the base image in the starting_image directory
@@ -36,16 +210,21 @@ class BaseImageEditor:
         Returns:
             str: Path to the base image file
         """
+        # Reuse the cached path unless the file was renamed or replaced
+        if self._base_image_path is not None:
+            if os.path.isfile(self._base_image_path):
+                return self._base_image_path
+            self._base_image_path = None
+        
         if not os.path.exists(self.starting_image_dir):
             raise FileNotFoundError(f"Starting image directory '{self.starting_image_dir}' not found")
         
         # Get all image files in the directory
-        image_extensions = ['.png', '.jpg', '.jpeg', '.webp', '.bmp']
-        image_files = []
-        
-        for file in os.listdir(self.starting_image_dir):
-            if any(file.lower().endswith(ext) for ext in image_extensions):
-                image_files.append(file)
+        with os.scandir(self.starting_image_dir) as entries:
+            image_files = [
+                entry.name for entry in entries
+                if entry.is_file() and entry.name.lower().endswith(_IMAGE_EXTENSIONS)
+            ]
         
         if not image_files:
             raise FileNotFoundError("No image files found in starting_image directory")
@@ -53,7 +232,8 @@ class BaseImageEditor:
         if len(image_files) > 1:
             print(f"Multiple images found, using: {image_files[0]}")
         
-        return os.path.join(self.starting_image_dir, image_files[0])
+        self._base_image_path = os.path.join(self.starting_image_dir, image_files[0])
+        return self._base_image_path
     
     def get_base_filename_without_extension(self, image_path):
         """
@@ -69,12 +249,12 @@ class BaseImageEditor:
         name_without_ext = os.path.splitext(filename)[0]
         return name_without_ext
     
-    def generate_output_filename(self, base_filename, expression_type, variation_number, file_extension):
+    def generate_output_filename(self, prefix, expression_type, variation_number, file_extension):
         """
         Generate the output filename based on expression type and variation number
         
         Args:
-            base_filename (str): Original filename without extension
+            prefix (str): Output filename prefix derived from the base image
             expression_type (str): Type of expression
             variation_number (int): Variation number
             file_extension (str): File extension (e.g., '.png')
@@ -82,12 +262,6 @@ class BaseImageEditor:
         Returns:
             str: Generated filename
         """
-        # For all types, find the first '-' and keep everything up to and including it
-        if '-' in base_filename:
-            prefix = base_filename[:base_filename.find('-') + 1]
-        else:
-            prefix = base_filename + '-'
-        
         if expression_type == 'neutral':
             # For neutral: prefix + "baseimage" + number
             return f"{prefix}baseimage{variation_number}{file_extension}"
@@ -110,27 +284,63 @@ class BaseImageEditor:
             # Fallback to original naming scheme
             return f"{expression_type}_variation_{variation_number:02d}{file_extension}"
     
-    def load_image_as_base64(self, image_path):
+    async def upload_image(self, image_path):
         """
-        Load image file and convert to base64
+        Upload an image file to the Gemini Files API
         
         Args:
             image_path (str): Path to the image file
             
         Returns:
-            tuple: (base64_data, mime_type)
+            types.File: Uploaded file, reusable across requests
         """
-        with open(image_path, 'rb') as image_file:
-            image_data = image_file.read()
-            image_base64 = base64.b64encode(image_data).decode('utf-8')
-            
-        # Determine MIME type
-        mime_type, _ = mimetypes.guess_type(image_path)
-        if not mime_type:
-            # Default to PNG if can't determine
-            mime_type = "image/png"
+        # Determine MIME type, defaulting to PNG if can't determine
+        mime_type = _EXT_TO_MIME.get(os.path.splitext(image_path)[1].lower(), "image/png")
+        
+        uploaded_file = await self.client.aio.files.upload(
+            file=image_path,
+            config=types.UploadFileConfig(mime_type=mime_type),
+        )
+        self._uploaded_files.append(uploaded_file)
+        return uploaded_file
+    
+    async def _load_base_image_context(self, image_path):
+        """
+        Upload the base image once so all variations and later menu actions can reference it
+        
+        Args:
+            image_path (str): Path to the base image
             
-        return image_base64, mime_type
+        Returns:
+            BaseImageCtx: Image part and output prefix
+        """
+        stat = os.stat(image_path)
+        cache_key = (image_path, stat.st_mtime_ns, stat.st_size)
+        if (
+            self._base_image_ctx is not None
+            and self._base_image_key == cache_key
+            and datetime.now(timezone.utc) < self._base_image_expires_at - UPLOAD_EXPIRY_MARGIN
+        ):
+            return self._base_image_ctx
+        
+        uploaded_at = datetime.now(timezone.utc)
+        uploaded_file = await self.upload_image(image_path)
+        base_filename = self.get_base_filename_without_extension(image_path)
+        
+        # Find the first '-' and keep everything up to and including it
+        if '-' in base_filename:
+            prefix = base_filename[:base_filename.find('-') + 1]
+        else:
+            prefix = base_filename + '-'
+        
+        # Requests reference the uploaded file instead of carrying the image bytes
+        image_part = types.Part.from_uri(file_uri=uploaded_file.uri, mime_type=uploaded_file.mime_type)
+        
+        self._base_image_ctx = BaseImageCtx(image_part, prefix)
+        self._base_image_key = cache_key
+        # Wall-clock expiry, so time spent suspended still counts
+        self._base_image_expires_at = uploaded_file.expiration_time or uploaded_at + UPLOAD_RETENTION
+        return self._base_image_ctx
     
     def generate_random_outfit_prompt(self):
         """
@@ -139,32 +349,9 @@ class BaseImageEditor:
         Returns:
             str: Description of a casual outfit
         """
-        tops = [
-            "plain t-shirt", "hoodie", "sweater", "cardigan", "blouse", "tank top",
-            "long-sleeve shirt", "polo shirt", "button-up shirt", "crop top",
-            "plain t-shirt", "graphic tee", "hoodie", "crewneck sweater", "zip-up hoodie",
-            "cardigan", "blouse", "tank top", "long-sleeve shirt", "crop top",
-            "off-shoulder top", "button-up shirt", "polo shirt", "tube top", "knit top",
-            "halter top", "peplum top", "wrap top", "mock neck top", "camisole"
-        ]
-        
-        bottoms = [
-            "jeans", "leggings", "sweatpants", "shorts", "joggers", "chinos",
-            "casual pants", "denim shorts", "yoga pants", "wide-leg trousers",
-            "jeans", "denim shorts", "leggings", "joggers", "sweatpants",
-            "cargo pants", "bike shorts", "mini skirt", "midi skirt",
-            "culottes", "overalls", "capri pants", "khaki shorts", "skort",
-            "paperbag waist shorts", "pleated skirt", "track pants", "flare jeans", 
-            "athletic shorts"
-        ]
-        
-        accessories = [
-            "", "with a simple necklace", "with small earrings", "with a bracelet", ""
-        ]
-
-        top = random.choice(tops)
-        bottom = random.choice(bottoms)
-        accessory = random.choice(accessories)
+        top = random.choice(_TOPS)
+        bottom = random.choice(_BOTTOMS)
+        accessory = random.choice(_ACCESSORIES)
         
         outfit = f"neutral colored {top} and {bottom} {accessory}".strip()
         return outfit
@@ -176,20 +363,7 @@ class BaseImageEditor:
         Returns:
             str: Description of bedroom background variation
         """
-        bedroom_elements = [
-            "slightly shift the camera angle to show more of the left side of the bedroom",
-            "adjust the view to reveal more of the right side of the room",
-            "shift the perspective to show a bit more of the background wall",
-            "move the viewpoint to include more of the bedroom decor in the background",
-            "adjust the angle to show a different section of the room's furniture",
-            "shift the frame to reveal more of the bedroom's ambient lighting",
-            "change the perspective to show a different corner of the bedroom",
-            "modify the view to include more of the bedroom's wall decorations",
-            "adjust the framing to show a slightly different portion of the room",
-            "shift the camera position to reveal different bedroom elements in the background"
-        ]
-        
-        return random.choice(bedroom_elements)
+        return random.choice(_BEDROOM_ELEMENTS)
     
     def create_variation_prompt(self, variation_number, expression_type, fixed_outfit=None):
         """
@@ -204,74 +378,15 @@ class BaseImageEditor:
             str: Complete prompt for image generation
         """
         if fixed_outfit:
-            outfit = fixed_outfit
+            clothing = _CLOTHING_FIXED
         else:
-            outfit = self.generate_random_outfit_prompt()
+            clothing = _CLOTHING_RANDOM.format(outfit=self.generate_random_outfit_prompt())
             
-        background_change = self.generate_background_variation()
-        
-        # Set expression change based on type
-        if expression_type == 'neutral':
-            expression_change = "\n4. EXPRESSION: alter her expression to a different neutral expression with a change in head tilt."
-        elif expression_type == 'sobbing':
-            expression_change = "\n4. EXPRESSION: Change her expression and make it look like she is sobbing."
-        elif expression_type == 'snapchat_goofy' or expression_type == 'snapchat_same_goofy': 
-            expression_change = "\n4. EXPRESSION: have a silly face with side eye. bring camera closer to face." 
-        elif expression_type == 'snapchat_tongue' or expression_type == 'snapchat_same_tongue': 
-            expression_change = "\n4. EXPRESSION: have a goofy face with silly tongue out. bring camera closer to face." 
-        elif expression_type == 'snapchat_confused' or expression_type == 'snapchat_same_confused': 
-            expression_change = "\n4. EXPRESSION: have a shocked face. bring camera closer to face." 
-        elif expression_type == 'snapchat_shocked' or expression_type == 'snapchat_same_shocked': 
-            expression_change = "\n4. EXPRESSION: have a silly confused face. bring camera closer to face." 
-        elif expression_type == 'snapchat_crying' or expression_type == 'snapchat_same_crying': 
-            expression_change = "\n4. EXPRESSION: Change her expression and make it look like she is sobbing. Bring camera closer to face"
-        else:
-            expression_change = ""
-        
-        if fixed_outfit:
-            prompt = f"""Create a variation of this selfie image with the following changes:
-
-1. CLOTHING: Keep outfit exactly the same.
-
-2. BACKGROUND: {background_change}. Maintain the same setting as the original input image with a slight perspective change.
-
-3. REQUIREMENTS:
-   - Keep the same person's face and general pose
-   - If the person's arm is extended under the camera, keep it in a selfie position with arm etended below.
-   - Maintain the selfie/portrait style composition
-   - Keep lighting natural and consistent with a bedroom environment
-   - Ensure the outfit looks realistic and well-fitted
-   - Keep the overall mood and atmosphere similar to the original
-   - Do not change any of the decor or bedroom background
-   - Keep the person's position the same
-   - Do not change the setting
-   - No artifacts or filters on the image
-   - No change in camera position{expression_change}
-
-Generate a high-quality, realistic variation that maintains the original's authenticity while incorporating these changes."""
-        else:
-            prompt = f"""Create a variation of this selfie image with the following changes:
-
-1. CLOTHING: Change the person's outfit to: {outfit}. Keep the style casual and natural-looking.
-
-2. BACKGROUND: {background_change}. Maintain the same setting as the original input image with a slight perspective change.
-
-3. REQUIREMENTS:
-   - Keep the same person's face and general pose
-   - If the person's arm is extended under the camera, keep it in a selfie position with arm etended below.
-   - Maintain the selfie/portrait style composition
-   - Keep lighting natural and consistent with a bedroom environment
-   - Ensure the outfit looks realistic and well-fitted
-   - Keep the overall mood and atmosphere similar to the original
-   - Do not change any of the decor or bedroom background
-   - Keep the person's position the same
-   - Do not change the setting
-   - No artifacts or filters on the image
-   - No change in camera position{expression_change}
-
-Generate a high-quality, realistic variation that maintains the original's authenticity while incorporating these changes."""
-
-        return prompt
+        return _PROMPT_TEMPLATE.format_map({
+            'clothing': clothing,
+            'background_change': self.generate_background_variation(),
+            'expression_change': _EXPRESSION_MAP.get(expression_type, ""),
+        })
     
     def save_binary_file(self, file_name, data):
         """
@@ -285,12 +400,57 @@ Generate a high-quality, realistic variation that maintains the original's authe
             f.write(data)
         print(f"✓ File saved to: {file_name}")
     
-    def generate_variation(self, base_image_path, prompt, variation_number, expression_type):
+    async def _generate_image(self, ctx, contents, variation_number, expression_type):
+        """
+        Send one generation request and save the returned image to the output directory
+        
+        Args:
+            ctx (BaseImageCtx): Preloaded base image context
+            contents (list): Request contents
+            variation_number (int): Variation number for naming
+            expression_type (str): Type of expression for naming
+            
+        Returns:
+            bool: Whether an image was saved
+        """
+        response = await self.client.aio.models.generate_content(
+            model=self.model,
+            contents=contents,
+            config=_GENERATE_CONFIG,
+        )
+        
+        if (
+            not response.candidates
+            or response.candidates[0].content is None
+            or response.candidates[0].content.parts is None
+        ):
+            return False
+        
+        for part in response.candidates[0].content.parts:
+            # Check for image data
+            if part.inline_data and part.inline_data.data:
+                file_extension = _MIME_TO_EXT.get(part.inline_data.mime_type, ".png")  # Default to PNG
+                
+                # Generate custom output filename
+                output_filename = self.generate_output_filename(ctx.prefix, expression_type, variation_number, file_extension)
+                output_path = os.path.join(self.output_dir, output_filename)
+                
+                # Write on a worker thread so the event loop keeps serving other requests
+                await asyncio.to_thread(self.save_binary_file, output_path, part.inline_data.data)
+                return True
+            
+            # Print any text output
+            if part.text:
+                print(f"Response text: {part.text}")
+        
+        return False
+    
+    async def generate_variation(self, ctx, prompt, variation_number, expression_type):
         """
         Generate a single image variation using Gemini
         
         Args:
-            base_image_path (str): Path to the base image
+            ctx (BaseImageCtx): Preloaded base image context
             prompt (str): Generation prompt
             variation_number (int): Variation number for naming
             expression_type (str): Type of expression for display
@@ -304,86 +464,89 @@ Generate a high-quality, realistic variation that maintains the original's authe
             variation_type = f" (with {display_type} expression)"
             print(f"Generating variation {variation_number}/5{variation_type}...")
             
-            # Load image as base64
-            image_base64, mime_type = self.load_image_as_base64(base_image_path)
-            
-            # Create contents for the API call
+            # Create contents for the API call; only the first turn is per variation
             contents = [
                 types.Content(
                     role="user",
                     parts=[
-                        types.Part.from_bytes(
-                            mime_type=mime_type,
-                            data=base64.b64decode(image_base64),
-                        ),
+                        ctx.image_part,
                         types.Part.from_text(text=prompt),
                     ],
                 ),
-                types.Content(
-                    role="model",
-                    parts=[],
-                ),
-                types.Content(
-                    role="user",
-                    parts=[
-                        types.Part.from_text(text="Generate the variation now."),
-                    ],
-                ),
+                _EMPTY_MODEL_TURN,
+                _GENERATE_TURN,
             ]
             
-            # Configure generation
-            generate_content_config = types.GenerateContentConfig(
-                response_modalities=[
-                    "IMAGE",
-                    "TEXT",
-                ],
-            )
-            
-            # Generate content stream
-            file_saved = False
-            for chunk in self.client.models.generate_content_stream(
-                model=self.model,
-                contents=contents,
-                config=generate_content_config,
-            ):
-                if (
-                    chunk.candidates is None
-                    or chunk.candidates[0].content is None
-                    or chunk.candidates[0].content.parts is None
-                ):
-                    continue
-                
-                # Check for image data
-                if (chunk.candidates[0].content.parts[0].inline_data and 
-                    chunk.candidates[0].content.parts[0].inline_data.data):
-                    
-                    inline_data = chunk.candidates[0].content.parts[0].inline_data
-                    data_buffer = inline_data.data
-                    file_extension = mimetypes.guess_extension(inline_data.mime_type)
-                    
-                    if not file_extension:
-                        file_extension = ".png"  # Default to PNG
-                    
-                    # Get base filename and generate custom output filename
-                    base_filename = self.get_base_filename_without_extension(base_image_path)
-                    output_filename = self.generate_output_filename(base_filename, expression_type, variation_number, file_extension)
-                    output_path = os.path.join(self.output_dir, output_filename)
-                    
-                    self.save_binary_file(output_path, data_buffer)
-                    file_saved = True
-                    break
-                
-                # Print any text output
-                elif hasattr(chunk, 'text') and chunk.text:
-                    print(f"Response text: {chunk.text}")
-            
-            return file_saved
+            # Retry only when rate limited, backing off exponentially
+            for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+                try:
+                    return await self._generate_image(ctx, contents, variation_number, expression_type)
+                except errors.APIError as e:
+                    if e.code != 429 or attempt == MAX_RATE_LIMIT_RETRIES:
+                        raise
+                    delay = 2 ** attempt + random.random()
+                    print(f"Rate limited on variation {variation_number}, retrying in {delay:.1f} seconds...")
+                    await asyncio.sleep(delay)
             
         except Exception as e:
             print(f"✗ Error generating variation {variation_number}: {str(e)}")
             return False
     
-    def generate_variations(self, expression_type):
+    def _cleanup_outputs(self, prefix, expression_type):
+        """
+        Remove output files left over from a previous run of the same type
+        
+        Args:
+            prefix (str): Output filename prefix derived from the base image
+            expression_type (str): Menu expression type ('neutral', 'sobbing', 'snapchat', 'snapchat_same_outfit')
+        """
+        stem = _OUTPUT_STEMS.get(expression_type)
+        if stem is None:
+            return
+        
+        # One directory pass for the stem; extensions are checked on the matches
+        for path in Path(self.output_dir).glob(f"{glob.escape(prefix)}{stem}*"):
+            if not path.name.endswith(_IMAGE_EXTENSIONS):
+                continue
+            
+            # Same outfit files share the "snapchat" stem but belong to another menu option
+            if expression_type == "snapchat" and path.name.startswith(f"{prefix}snapchatsame"):
+                continue
+            
+            path.unlink(missing_ok=True)
+    
+    async def _generate_batch(self, ctx, jobs, fixed_outfit=None):
+        """
+        Run variation requests concurrently, at most MAX_CONCURRENT_REQUESTS at a time
+        
+        Args:
+            ctx (BaseImageCtx): Preloaded base image context
+            jobs (list): (variation_number, expression_type) pairs to generate
+            fixed_outfit (str, optional): Use this specific outfit for every variation
+            
+        Returns:
+            int: Number of successfully generated variations
+        """
+        # Build every prompt up front so the tasks below only wait on the API
+        prompts = [self.create_variation_prompt(i, t, fixed_outfit) for i, t in jobs]
+        
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        
+        async def run(prompt, variation_number, expression_type):
+            async with semaphore:
+                return await self.generate_variation(ctx, prompt, variation_number, expression_type)
+        
+        # Schedule tasks in variation order so they start (and log) in sequence
+        tasks = [asyncio.ensure_future(run(prompt, i, t)) for prompt, (i, t) in zip(prompts, jobs)]
+        
+        successful_generations = 0
+        for task in asyncio.as_completed(tasks):
+            if await task:
+                successful_generations += 1
+        
+        return successful_generations
+    
+    async def generate_variations_async(self, expression_type):
         """
         Generate 5 variations of the base image with specified expression type
         
@@ -398,7 +561,13 @@ Generate a high-quality, realistic variation that maintains the original's authe
             base_image_path = self.get_base_image_path()
             print(f"Using base image: {base_image_path}")
             
-            successful_generations = 0
+            # Upload (or reuse) the base image once for all variations
+            ctx = await self._load_base_image_context(base_image_path)
+            
+            # Clear output directory of previous variations of this type
+            self._cleanup_outputs(ctx.prefix, expression_type)
+            
+            fixed_outfit = None
             
             # Special handling for Snapchat variations with same outfit
             if expression_type == "snapchat_same_outfit":
@@ -414,29 +583,8 @@ Generate a high-quality, realistic variation that maintains the original's authe
                 fixed_outfit = self.generate_random_outfit_prompt()
                 print(f"Using same outfit for all variations: {fixed_outfit}")
                 
-                # Clear output directory of previous snapchat same outfit variations
-                base_filename = self.get_base_filename_without_extension(base_image_path)
-                # Find the first '-' and keep everything up to and including it
-                if '-' in base_filename:
-                    prefix = base_filename[:base_filename.find('-') + 1]
-                else:
-                    prefix = base_filename + '-'
-                    
-                for file in os.listdir(self.output_dir):
-                    if file.startswith(f"{prefix}snapchatsame") and file.endswith(('.png', '.jpg', '.jpeg')):
-                        os.remove(os.path.join(self.output_dir, file))
-                
                 # Generate one of each snapchat type with the same outfit
-                for i, snap_type in enumerate(snapchat_types, 1):
-                    prompt = self.create_variation_prompt(i, snap_type, fixed_outfit)
-                    
-                    if self.generate_variation(base_image_path, prompt, i, snap_type):
-                        successful_generations += 1
-                    
-                    # Add a delay to avoid rate limiting
-                    if i < len(snapchat_types):  # Don't wait after the last one
-                        print("Waiting 3 seconds before next generation...")
-                        time.sleep(3)
+                jobs = list(enumerate(snapchat_types, 1))
             
             # Special handling for Snapchat variations
             elif expression_type == "snapchat":
@@ -448,59 +596,14 @@ Generate a high-quality, realistic variation that maintains the original's authe
                     "snapchat_crying"
                 ]
                 
-                # Clear output directory of previous snapchat variations
-                base_filename = self.get_base_filename_without_extension(base_image_path)
-                # Find the first '-' and keep everything up to and including it
-                if '-' in base_filename:
-                    prefix = base_filename[:base_filename.find('-') + 1]
-                else:
-                    prefix = base_filename + '-'
-                    
-                for file in os.listdir(self.output_dir):
-                    if file.startswith(f"{prefix}snapchat") and file.endswith(('.png', '.jpg', '.jpeg')) and not file.startswith(f"{prefix}snapchatsame"):
-                        os.remove(os.path.join(self.output_dir, file))
-                
                 # Generate one of each snapchat type
-                for i, snap_type in enumerate(snapchat_types, 1):
-                    prompt = self.create_variation_prompt(i, snap_type)
-                    
-                    if self.generate_variation(base_image_path, prompt, i, snap_type):
-                        successful_generations += 1
-                    
-                    # Add a delay to avoid rate limiting
-                    if i < len(snapchat_types):  # Don't wait after the last one
-                        print("Waiting 3 seconds before next generation...")
-                        time.sleep(3)
+                jobs = list(enumerate(snapchat_types, 1))
             
             else:
-                # Clear output directory of previous variations with same expression type
-                base_filename = self.get_base_filename_without_extension(base_image_path)
-                # Find the first '-' and keep everything up to and including it
-                if '-' in base_filename:
-                    prefix = base_filename[:base_filename.find('-') + 1]
-                else:
-                    prefix = base_filename + '-'
-                    
-                for file in os.listdir(self.output_dir):
-                    if expression_type == 'neutral':
-                        if file.startswith(f"{prefix}baseimage") and file.endswith(('.png', '.jpg', '.jpeg')) and not file.startswith(f"{prefix}cryingbaseimage"):
-                            os.remove(os.path.join(self.output_dir, file))
-                    elif expression_type == 'sobbing':
-                        if file.startswith(f"{prefix}cryingbaseimage") and file.endswith(('.png', '.jpg', '.jpeg')):
-                            os.remove(os.path.join(self.output_dir, file))
-                
                 # Generate 5 variations of the same type
-                for i in range(1, 6):
-                    prompt = self.create_variation_prompt(i, expression_type)
-                    success, _ = self.generate_variation(base_image_path, prompt, i, expression_type)
-                    
-                    if success:
-                        successful_generations += 1
-                    
-                    # Add a delay to avoid rate limiting
-                    if i < 5:  # Don't wait after the last one
-                        print("Waiting 3 seconds before next generation...")
-                        time.sleep(3)
+                jobs = [(i, expression_type) for i in range(1, 6)]
+            
+            successful_generations = await self._generate_batch(ctx, jobs, fixed_outfit)
             
             display_type = expression_type.replace('_', ' ').title()
             if expression_type == "snapchat":
@@ -519,6 +622,17 @@ Generate a high-quality, realistic variation that maintains the original's authe
             print(f"❌ Error during generation process: {str(e)}")
             return 0
 
+    async def aclose(self):
+        """
+        Delete files uploaded during the session
+        """
+        for uploaded_file in self._uploaded_files:
+            try:
+                await self.client.aio.files.delete(name=uploaded_file.name)
+            except Exception as e:
+                print(f"⚠️  Could not delete uploaded file {uploaded_file.name}: {str(e)}")
+        self._uploaded_files.clear()
+
     def display_menu(self):
         """
         Display the main menu options
@@ -533,6 +647,25 @@ Generate a high-quality, realistic variation that maintains the original's authe
         print("5. Quit")
         print("=" * 50)
 
+def _cancel_pending_tasks(loop):
+    """
+    Cancel every task still running on the loop and wait for them to finish
+    
+    Args:
+        loop (asyncio.AbstractEventLoop): Session event loop
+    """
+    pending = asyncio.all_tasks(loop)
+    for task in pending:
+        task.cancel()
+    
+    while pending:
+        try:
+            loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+        except KeyboardInterrupt:
+            # A task re-raised the interrupt while unwinding; keep waiting on the rest
+            pass
+        pending = {task for task in pending if not task.done()}
+
 def main():
     """
     Main function to run the base image editor with menu system
@@ -552,9 +685,14 @@ def main():
             print("❌ API key is required to run this script.")
             return
     
+    # One event loop for the whole session so the async client's
+    # connections stay usable between menu actions
+    loop = asyncio.new_event_loop()
+    editor = None
     try:
         # Initialize the editor
         editor = BaseImageEditor(api_key)
+        loop.run_until_complete(editor.warm_up())
         
         while True:
             editor.display_menu()
@@ -562,7 +700,7 @@ def main():
             
             if choice == "1":
                 print("\n🎭 Generating neutral expression variations...")
-                successful = editor.generate_variations("neutral")
+                successful = loop.run_until_complete(editor.generate_variations_async("neutral"))
                 if successful > 0:
                     print(f"\n✨ Successfully created {successful} neutral expression variations!")
                 else:
@@ -570,7 +708,7 @@ def main():
                     
             elif choice == "2":
                 print("\n😢 Generating sobbing expression variations...")
-                successful = editor.generate_variations("sobbing")
+                successful = loop.run_until_complete(editor.generate_variations_async("sobbing"))
                 if successful > 0:
                     print(f"\n✨ Successfully created {successful} sobbing expression variations!")
                 else:
@@ -578,7 +716,7 @@ def main():
                     
             elif choice == "3":
                 print("\n📱 Generating Snapchat variations (one of each type)...")
-                successful = editor.generate_variations("snapchat")
+                successful = loop.run_until_complete(editor.generate_variations_async("snapchat"))
                 if successful > 0:
                     print(f"\n✨ Successfully created {successful} Snapchat variations!")
                     print("   Types: Goofy, Tongue, Confused, Shocked, Crying")
@@ -587,7 +725,7 @@ def main():
                     
             elif choice == "4":
                 print("\n📱👕 Generating Snapchat variations with same outfit...")
-                successful = editor.generate_variations("snapchat_same_outfit")
+                successful = loop.run_until_complete(editor.generate_variations_async("snapchat_same_outfit"))
                 if successful > 0:
                     print(f"\n✨ Successfully created {successful} Snapchat same outfit variations!")
                     print("   Types: Goofy, Tongue, Confused, Shocked, Crying (all with same outfit)")
@@ -612,6 +750,16 @@ def main():
             
     except Exception as e:
         print(f"❌ Script error: {str(e)}")
+    finally:
+        # Cancel requests still in flight (e.g. after Ctrl+C) before their upload is deleted
+        _cancel_pending_tasks(loop)
+        
+        if editor is not None:
+            loop.run_until_complete(editor.aclose())
+        
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.run_until_complete(loop.shutdown_default_executor())
+        loop.close()
 
 if __name__ == "__main__":
     main()